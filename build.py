@@ -9,25 +9,49 @@ Usage:
     python build.py clean    # Clean build files
 """
 
-import subprocess
+import asyncio
 import sys
 import os
 
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 ENV = "esp32dev"  # Change to "esp32-s3" for ESP32-S3
 
-def run_pio(args):
-    """Run PlatformIO command"""
+async def _stream(reader):
+    """Forward child output to our stdout as it is produced"""
+    while True:
+        chunk = await reader.read(4096)
+        if not chunk:
+            break
+        sys.stdout.buffer.write(chunk)
+        sys.stdout.flush()
+
+async def run_pio_async(args, capture=False):
+    """Run PlatformIO command and return its exit code.
+
+    With capture=True stdout is piped and streamed back; otherwise the
+    child inherits our fds (needed by monitor so Ctrl+C keeps working).
+    """
     cmd = ["pio"] + args
     print(f"\n>>> Running: {' '.join(cmd)}")
     print("-" * 60)
-    result = subprocess.run(cmd, cwd=PROJECT_DIR)
-    return result.returncode == 0
+    sys.stdout.flush()
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=PROJECT_DIR,
+        stdout=asyncio.subprocess.PIPE if capture else None,
+    )
+    if capture:
+        await _stream(proc.stdout)
+    return await proc.wait()
+
+def run_pio(args, capture=False):
+    """Run PlatformIO command"""
+    return asyncio.run(run_pio_async(args, capture)) == 0
 
 def build():
     """Build the project"""
     print("\n=== Building DataLogger ===")
-    return run_pio(["run", "-e", ENV])
+    return run_pio(["run", "-e", ENV], capture=True)
 
 def upload():
     """Build and upload to ESP32"""
@@ -43,7 +67,7 @@ def monitor():
 def clean():
     """Clean build files"""
     print("\n=== Cleaning build files ===")
-    return run_pio(["run", "-e", ENV, "-t", "clean"])
+    return run_pio(["run", "-e", ENV, "-t", "clean"], capture=True)
 
 def main():
     action = sys.argv[1] if len(sys.argv) > 1 else "build"
@@ -1,27 +1,49 @@
-import subprocess
+import asyncio
+import collections
 import sys
 
-# Run PlatformIO build and capture all output
-result = subprocess.run(
-    ['pio', 'run', '-e', 'esp32dev'],
-    cwd=r'c:\Users\loyol\Documents\Interlabs\ProyectoFinal\DataLogger',
-    capture_output=True,
-    text=True
-)
-
-# Print stdout
-print("=== STDOUT ===")
-print(result.stdout)
-
-# Print stderr
-print("\n=== STDERR ===")
-print(result.stderr)
-
-# Print last 100 lines of combined output
-print("\n=== LAST 100 LINES ===")
-all_output = result.stdout + "\n" + result.stderr
-lines = all_output.split('\n')
-for line in lines[-100:]:
-    print(line)
-
-sys.exit(result.returncode)
+PROJECT_DIR = r'c:\Users\loyol\Documents\Interlabs\ProyectoFinal\DataLogger'
+TAIL_LINES = 100
+# Per-line StreamReader limit (compiler command lines can be long)
+LINE_LIMIT = 1 << 20
+
+
+async def _tail(stream, label, tail):
+    """Print each line as it arrives and keep the most recent ones in `tail`"""
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            break
+        line = raw.decode(errors='replace').rstrip('\r\n')
+        print(f"[{label}] {line}", flush=True)
+        tail.append(line)
+
+
+async def main():
+    # Run PlatformIO build and stream all output
+    proc = await asyncio.create_subprocess_exec(
+        'pio', 'run', '-e', 'esp32dev',
+        cwd=PROJECT_DIR,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=LINE_LIMIT,
+    )
+
+    # Both streams feed the same tail, in arrival order
+    tail = collections.deque(maxlen=TAIL_LINES)
+    await asyncio.gather(
+        _tail(proc.stdout, 'STDOUT', tail),
+        _tail(proc.stderr, 'STDERR', tail),
+    )
+    returncode = await proc.wait()
+
+    # Print last 100 lines of combined output
+    print(f"\n=== LAST {TAIL_LINES} LINES ===")
+    for line in tail:
+        print(line)
+
+    return returncode
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
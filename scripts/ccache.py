@@ -0,0 +1,50 @@
+"""
+ESP32 DataLogger - ccache wrapper (PlatformIO extra_script)
+
+Registered as a pre script: PlatformIO has already put the toolchain on the
+SCons PATH, but the platform builder has not cloned any build environment
+yet, so whatever is set here reaches every env that compiles (project,
+ESP-IDF components, libraries). Instead of rewriting CC/CXX (SCons mangles
+long command lines), it puts ccache symlinks named like the cross compilers
+in a directory that is prepended to PATH, ahead of the toolchain directory;
+ccache then forwards to the real compiler.
+Does nothing if ccache is not installed.
+
+Check it with `ccache -s` after two builds: the second should report hits.
+"""
+
+Import("env")
+
+import os
+import shutil
+import sys
+
+# Same naming as the espressif32 platform builder uses for CC/CXX
+XTENSA_MCUS = ("esp32", "esp32s2", "esp32s3")
+
+ccache = shutil.which("ccache")
+
+if ccache:
+    project_dir = env.subst("$PROJECT_DIR")
+    bin_dir = os.path.join(env.subst("$PROJECT_WORKSPACE_DIR"), "ccache-bin")
+    os.makedirs(bin_dir, exist_ok=True)
+
+    mcu = env.BoardConfig().get("build.mcu", "esp32")
+    arch = f"xtensa-{mcu}" if mcu in XTENSA_MCUS else "riscv32-esp"
+
+    suffix = ".exe" if sys.platform == "win32" else ""
+    for tool in ("gcc", "g++"):
+        link = os.path.join(bin_dir, f"{arch}-elf-{tool}{suffix}")
+        if os.path.lexists(link):
+            continue
+        try:
+            os.symlink(ccache, link)
+        except OSError:
+            # Windows without symlink privilege: a renamed copy works the same
+            shutil.copy2(ccache, link)
+
+    env.PrependENVPath("PATH", bin_dir)
+    env["ENV"]["CCACHE_BASEDIR"] = project_dir
+    env["ENV"]["CCACHE_SLOPPINESS"] = "pch_defines,time_macros"
+    env["ENV"]["CCACHE_MAXSIZE"] = "2G"
+    print(f"ccache enabled ({ccache})")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de clientes MQTT compartido por los scripts de prueba
+
+Mantiene un unico paho Client por (host, port): la primera llamada a
+get_client() conecta y arranca el loop de red, las siguientes reutilizan
+la misma conexion. Cada script registra su propio callback por topic con
+message_callback_add() para no pisar el on_message de los demas.
+
+Las suscripciones se hacen con subscribe() del pool: quedan registradas por
+cliente y se vuelven a emitir en cada on_connect, porque con
+clean_session=True el broker las olvida cuando el loop reconecta solo.
+"""
+
+import atexit
+import threading
+
+import paho.mqtt.client as mqtt
+
+CONNECT_TIMEOUT = 5
+
+_clients = {}
+_subscriptions = {}     # client -> {topic: qos}
+_pending_subacks = {}   # mid -> Event
+_lock = threading.Lock()
+_sub_lock = threading.Lock()
+
+def _new_client():
+    """Crea un cliente con la API de callbacks v1 (compatible con paho 1.x y 2.x)"""
+    try:
+        return mqtt.Client(clean_session=True, callback_api_version=mqtt.CallbackAPIVersion.VERSION1)
+    except AttributeError:
+        # Fallback para versiones antiguas
+        return mqtt.Client(clean_session=True)
+
+def _close(client):
+    client.disconnect()
+    client.loop_stop()
+
+def get_client(host, port, timeout=CONNECT_TIMEOUT):
+    """Devuelve el cliente conectado a host:port, creandolo si no existe"""
+    key = (host, port)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+
+        connected = threading.Event()
+
+        def on_connect(client, userdata, flags, rc):
+            if rc != 0:
+                return
+            # Re-suscribir tras una reconexion (en la primera no hay nada aun)
+            topics = list(_subscriptions.get(client, {}).items())
+            if topics:
+                client.subscribe(topics)
+            connected.set()
+
+        client = _new_client()
+        client.on_connect = on_connect
+        client.on_subscribe = _on_subscribe
+        client.connect_async(host, port, 60)
+        client.loop_start()
+
+        if not connected.wait(timeout):
+            client.loop_stop()
+            raise ConnectionError(f"No se pudo conectar al broker {host}:{port}")
+
+        atexit.register(_close, client)
+        _clients[key] = client
+        return client
+
+def _on_subscribe(client, userdata, mid, granted_qos):
+    with _sub_lock:
+        event = _pending_subacks.pop(mid, None)
+    if event is not None:
+        event.set()
+
+def subscribe(client, topic, qos=0, timeout=CONNECT_TIMEOUT):
+    """Suscribe y recuerda el topic para reconexiones; espera el SUBACK.
+
+    Devuelve True si el broker confirmo la suscripcion dentro de `timeout`.
+    """
+    _subscriptions.setdefault(client, {})[topic] = qos
+    event = threading.Event()
+    # Mismo lock que _on_subscribe: el SUBACK no se procesa antes de registrar el mid
+    with _sub_lock:
+        rc, mid = client.subscribe(topic, qos)
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            return False
+        _pending_subacks[mid] = event
+    return event.wait(timeout)
+
+def unsubscribe(client, topic):
+    """Desuscribe y olvida el topic"""
+    _subscriptions.get(client, {}).pop(topic, None)
+    client.unsubscribe(topic)
@@ -4,28 +4,42 @@
 Script de diagnostico MQTT - Verifica conexion y topics
 """
 
-import paho.mqtt.client as mqtt
+from _mqtt_pool import get_client, subscribe, unsubscribe
+import paho.mqtt.publish as publish
+import collections
 import json
-import time
+import threading
 import sys
 
 BROKER_HOST = "localhost"
 BROKER_PORT = 1883
+LISTEN_TIMEOUT = 30
+STOP_AFTER = None  # Terminar antes al recibir N mensajes (None = esperar todo el timeout)
 
-messages_received = []
+# Solo se guardan los últimos mensajes (la suscripción a # puede ser muy activa)
+MAX_MESSAGES = 1000
+PREVIEW_BYTES = 200
 
-def on_connect(client, userdata, flags, rc):
-    print(f"[OK] Conectado al broker MQTT")
-    # Suscribirse a todos los topics (#)
-    client.subscribe("#")
+messages_received = collections.deque(maxlen=MAX_MESSAGES)
+messages_total = 0
+done = threading.Event()
 
 def on_message(client, userdata, msg):
+    global messages_total
     topic = msg.topic
-    payload = msg.payload.decode('utf-8', errors='ignore')
+    # Decodificar solo lo que se va a mostrar
+    payload_preview = msg.payload[:PREVIEW_BYTES].decode('utf-8', errors='ignore')
     print(f"\n[MENSAJE RECIBIDO]")
     print(f"  Topic: {topic}")
-    print(f"  Payload: {payload[:200]}")  # Primeros 200 chars
-    messages_received.append((topic, payload))
+    print(f"  Payload: {payload_preview}")
+    messages_received.append((topic, payload_preview))
+    messages_total += 1
+    if STOP_AFTER is not None and messages_total >= STOP_AFTER:
+        done.set()
+
+def on_log(client, userdata, level, buf):
+    # Actividad real de red (PUBLISH, PINGREQ/PINGRESP, ...) en lugar de un tick por reloj
+    print(f"    [paho] {buf}")
 
 def main():
     print("=" * 60)
@@ -33,44 +47,46 @@ def main():
     print("=" * 60)
     print(f"Broker: {BROKER_HOST}:{BROKER_PORT}")
     print("Suscrito a todos los topics (#)")
-    print("Esperando mensajes por 30 segundos...")
+    print(f"Esperando mensajes por {LISTEN_TIMEOUT} segundos...")
     print("=" * 60)
     
-    client = mqtt.Client(client_id="diagnose_client", clean_session=True)
-    client.on_connect = on_connect
-    client.on_message = on_message
-    
     try:
-        client.connect(BROKER_HOST, BROKER_PORT, 60)
-        client.loop_start()
+        client = get_client(BROKER_HOST, BROKER_PORT)
+        print(f"[OK] Conectado al broker MQTT")
+        # Suscribirse a todos los topics (#)
+        client.message_callback_add("#", on_message)
+        if not subscribe(client, "#"):
+            print("[ERROR] El broker no confirmo la suscripcion a #")
+            return 1
         
         # Enviar un comando de prueba mientras escuchamos
-        time.sleep(2)
         print("\n[->] Enviando comando de prueba...")
         test_cmd = {
             "deviceId": "FJACFFBI",
             "command": "help",
             "args": ""
         }
-        client.publish("datalogger/commands", json.dumps(test_cmd), qos=1)
+        # Envio autocontenido (connect + publish + disconnect), independiente del suscriptor
+        publish.single("datalogger/commands", json.dumps(test_cmd), qos=1,
+                       hostname=BROKER_HOST, port=BROKER_PORT)
         print("    Comando enviado")
         
-        # Esperar mensajes
-        timeout = 30
-        elapsed = 0
-        while elapsed < timeout:
-            time.sleep(1)
-            elapsed += 1
-            if elapsed % 5 == 0:
-                print(f"    Esperando... ({elapsed}s)")
+        # Esperar mensajes: el loop de red del pool sigue corriendo en background
+        client.on_log = on_log
+        timer = threading.Timer(LISTEN_TIMEOUT, done.set)
+        timer.daemon = True
+        timer.start()
+        done.wait()
+        timer.cancel()
+        client.on_log = None
         
-        client.loop_stop()
-        client.disconnect()
+        unsubscribe(client, "#")
+        client.message_callback_remove("#")
         
         print("\n" + "=" * 60)
-        print(f"Total de mensajes recibidos: {len(messages_received)}")
+        print(f"Total de mensajes recibidos: {messages_total}")
         if len(messages_received) > 0:
-            print("\nMensajes recibidos:")
+            print(f"\nMensajes recibidos (ultimos {len(messages_received)}):")
             for topic, payload in messages_received:
                 print(f"  - {topic}: {payload[:100]}")
         else:
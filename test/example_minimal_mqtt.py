@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Ejemplo mínimo de cliente MQTT para enviar comandos y recibir respuestas"""
 
-import paho.mqtt.client as mqtt
 import json
-import time
+import threading
+
+from _mqtt_pool import get_client, subscribe
 
 # Configuración
 BROKER = "localhost"
@@ -14,13 +15,7 @@ DEVICE_ID = "FJACFFBI"
 
 # Variable para capturar la respuesta
 respuesta = None
-
-def on_connect(client, userdata, flags, rc):
-    """Callback cuando se conecta al broker"""
-    print(f"✓ Conectado al broker (código: {rc})")
-    # IMPORTANTE: Suscribirse al topic de respuestas ANTES de enviar comandos
-    client.subscribe(RESPONSE_TOPIC, qos=1)
-    print(f"✓ Suscrito a: {RESPONSE_TOPIC}")
+respuesta_event = threading.Event()
 
 def on_message(client, userdata, msg):
     """Callback cuando se recibe un mensaje"""
@@ -28,21 +23,19 @@ def on_message(client, userdata, msg):
     print(f"✓ Respuesta recibida en: {msg.topic}")
     respuesta = msg.payload.decode()
     print(f"\nRespuesta:\n{respuesta}")
+    respuesta_event.set()
 
-# Crear cliente
-client = mqtt.Client(client_id="mi_cliente", clean_session=True)
-client.on_connect = on_connect
-client.on_message = on_message
-
-# Conectar
+# Conectar (el pool ya deja el loop corriendo en background)
 print(f"Conectando a {BROKER}:{PORT}...")
-client.connect(BROKER, PORT, 60)
+client = get_client(BROKER, PORT)
+print("✓ Conectado al broker")
 
-# Iniciar loop en background (esto permite recibir mensajes)
-client.loop_start()
-
-# Esperar a que se establezca la conexión
-time.sleep(1)
+# IMPORTANTE: Suscribirse al topic de respuestas ANTES de enviar comandos
+client.message_callback_add(RESPONSE_TOPIC, on_message)
+if subscribe(client, RESPONSE_TOPIC, qos=1):
+    print(f"✓ Suscrito a: {RESPONSE_TOPIC}")
+else:
+    print(f"✗ Sin confirmacion de suscripcion a: {RESPONSE_TOPIC}")
 
 # Preparar comando (SIN campo 'id' - es opcional)
 comando = {
@@ -54,19 +47,16 @@ comando = {
 # Enviar comando
 print(f"\nEnviando comando a '{COMMAND_TOPIC}':")
 print(json.dumps(comando, indent=2))
-client.publish(COMMAND_TOPIC, json.dumps(comando), qos=1)
+info = client.publish(COMMAND_TOPIC, json.dumps(comando), qos=1)
+# QoS 1: bloquea hasta recibir el PUBACK del broker
+info.wait_for_publish(timeout=2.0)
 
 # Esperar respuesta (máximo 10 segundos)
 print("\nEsperando respuesta...")
-for i in range(10):
-    if respuesta:
-        break
-    time.sleep(1)
-    print(f"  Esperando... ({i+1}s)")
+respuesta_event.wait(timeout=10)
 
-# Detener y desconectar
-client.loop_stop()
-client.disconnect()
+# Dejar de escuchar (el pool desconecta al salir)
+client.message_callback_remove(RESPONSE_TOPIC)
 
 # Mostrar resultado final
 if respuesta:
@@ -4,11 +4,19 @@
 Script para obtener el Device ID del ESP32 mediante comando config
 """
 
-import paho.mqtt.client as mqtt
+from _mqtt_pool import get_client, subscribe
 import json
+import threading
 import time
 import sys
 
+# orjson (opcional) parsea bytes directamente y serializa a bytes
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    json_loads, json_dumps = json.loads, json.dumps
+
 # Configuración
 BROKER_HOST = "localhost"
 BROKER_PORT = 1883
@@ -24,19 +32,13 @@ POSSIBLE_IDS = [
     "FJACFFBI",  # El que el usuario mencionó
 ]
 
-response_received = False
+response_event = threading.Event()
 device_id_found = None
 
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        print(f"[OK] Conectado al broker")
-        client.subscribe(RESPONSE_TOPIC)
-
 def on_message(client, userdata, msg):
-    global response_received, device_id_found
+    global device_id_found
     try:
-        payload = msg.payload.decode('utf-8')
-        data = json.loads(payload)
+        data = json_loads(msg.payload)
         
         if data.get("type") == "command_response" and data.get("command") == "config":
             if data.get("status") == "ok" and "data" in data:
@@ -44,53 +46,54 @@ def on_message(client, userdata, msg):
                 if isinstance(config_data, dict) and "device" in config_data:
                     device_id_found = config_data["device"].get("id", "")
                     print(f"\n[OK] Device ID encontrado: {device_id_found}")
-                    response_received = True
+                    response_event.set()
     except:
         pass
 
-def try_device_id(client, device_id):
-    global response_received
-    response_received = False
+def probe_device_ids(client, device_ids, timeout=5):
+    """Publica el comando config para todos los IDs y espera la primera respuesta"""
+    response_event.clear()
+    request_id = f"get_id_{int(time.time())}"
+    pending = []
     
-    cmd_json = {
-        "deviceId": device_id,
-        "command": "config",
-        "args": "",
-        "id": f"get_id_{int(time.time())}"
-    }
+    for device_id in device_ids:
+        cmd_json = {
+            "deviceId": device_id,
+            "command": "config",
+            "args": "",
+            "id": request_id
+        }
+        print(f"  Probando Device ID: {device_id}...")
+        pending.append(client.publish(COMMAND_TOPIC, json_dumps(cmd_json), qos=1))
     
-    print(f"  Probando Device ID: {device_id}...")
-    client.publish(COMMAND_TOPIC, json.dumps(cmd_json), qos=1)
+    # QoS 1: confirmar que el broker aceptó todos los comandos (PUBACK)
+    for info in pending:
+        info.wait_for_publish(timeout=2.0)
     
-    timeout = 5
-    elapsed = 0
-    while not response_received and elapsed < timeout:
-        time.sleep(0.5)
-        elapsed += 0.5
-    
-    return response_received and device_id_found == device_id
+    # Solo responde el ESP32 cuyo ID coincide: una única espera para todos
+    if response_event.wait(timeout) and device_id_found in device_ids:
+        return device_id_found
+    return None
 
 def main():
     print("Buscando Device ID del ESP32...")
     print("Probando diferentes IDs posibles...\n")
     
-    client = mqtt.Client(client_id="get_id_client", clean_session=True)
-    client.on_connect = on_connect
-    client.on_message = on_message
-    
     try:
-        client.connect(BROKER_HOST, BROKER_PORT, 60)
-        client.loop_start()
-        time.sleep(1)
+        client = get_client(BROKER_HOST, BROKER_PORT)
+        print(f"[OK] Conectado al broker")
+        client.message_callback_add(RESPONSE_TOPIC, on_message)
+        if not subscribe(client, RESPONSE_TOPIC, qos=1):
+            print(f"[ERROR] El broker no confirmo la suscripcion a {RESPONSE_TOPIC}")
+            return 1
         
-        for device_id in POSSIBLE_IDS:
-            if try_device_id(client, device_id):
-                print(f"\n[OK] Device ID correcto: {device_id}")
-                print(f"\nUsa este ID en el script de prueba:")
-                print(f'DEVICE_ID = "{device_id}"')
-                client.loop_stop()
-                client.disconnect()
-                return 0
+        device_id = probe_device_ids(client, POSSIBLE_IDS)
+        if device_id:
+            print(f"\n[OK] Device ID correcto: {device_id}")
+            print(f"\nUsa este ID en el script de prueba:")
+            print(f'DEVICE_ID = "{device_id}"')
+            client.message_callback_remove(RESPONSE_TOPIC)
+            return 0
         
         print("\n[ERROR] No se encontro el Device ID correcto")
         print("Verifica:")
@@ -98,8 +101,7 @@ def main():
         print("2. Que el handler de comandos este activo")
         print("3. Que los topics sean correctos")
         
-        client.loop_stop()
-        client.disconnect()
+        client.message_callback_remove(RESPONSE_TOPIC)
         return 1
         
     except Exception as e:
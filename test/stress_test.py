@@ -7,85 +7,230 @@ Encuentra los parámetros que hacen fallar el sistema:
 - Velocidad máxima sostenida
 """
 
+import re
 import serial
+import sys
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuración
 DEBUG_PORT = "COM4"
 SNIFFER_PORT = "COM3"
 TIMEOUT = 10
+# Buffers del driver serie (solo Windows permite cambiarlos)
+RX_BUFFER_SIZE = 1 << 20
+TX_BUFFER_SIZE = 1 << 16
 
 # Archivo de log
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(SCRIPT_DIR, "stress_test.log")
 log_file = None
+# Hilo único para escribir el archivo de log: mantiene el orden y no bloquea los tests
+log_executor = None
 
-def log_write(tag, data):
-    """Escribe al archivo de log"""
+# Campos de la salida del comando stats
+_STATS_RE = re.compile(r'total=(\d+),\s*bursts=(\d+),\s*overflows=(\d+)')
+_DROPPED_RE = re.compile(r'dropped=(\d+)')
+# Línea del hex dump del comando read: "0010: 10 11 12 ..."
+_HEX_LINE_RE = re.compile(r'[0-9A-F]{4,}: ((?:[0-9A-F]{2} ?)+)')
+READ_MAX = 256  # Máximo de bytes por comando read en el firmware
+
+# Comandos fijos ya codificados
+_STATS_CMD = b"stats\n"
+_FORMAT_CMD = b"format\n"
+_FORMAT_DONE = ("FORMAT_OK", "FORMAT_FAIL")
+
+# Patrón de datos de prueba: 0x00..0xFF repetido
+_PATTERN = bytes(range(256))
+
+def _log_file_write(timestamp, tag, data):
     if log_file:
-        timestamp = time.strftime("%H:%M:%S")
-        log_file.write(f"[{timestamp}] {tag}: {data}\n")
-        log_file.flush()
+        log_file.write(f"[{timestamp}] {tag}: {data}\n".encode("utf-8", "replace"))
+
+def _log_done(future):
+    """Reporta errores del hilo de log (si no, el Future los ocultaría)"""
+    exc = future.exception()
+    if exc is not None:
+        print(f"[LOG] Error escribiendo {LOG_FILE}: {exc!r}", file=sys.stderr)
+
+# strftime solo cuando cambia el segundo
+_ts_second = None
+_ts_text = ""
+
+def _timestamp():
+    global _ts_second, _ts_text
+    now = int(time.time())
+    if now != _ts_second:
+        _ts_second = now
+        _ts_text = time.strftime("%H:%M:%S", time.localtime(now))
+    return _ts_text
+
+def log_write(tag, data):
+    """Imprime en consola y escribe al archivo de log (en el hilo de log si está activo)"""
+    timestamp = _timestamp()
     print(f"[{tag}] {data}")
+    if log_executor:
+        log_executor.submit(_log_file_write, timestamp, tag, data).add_done_callback(_log_done)
+    else:
+        _log_file_write(timestamp, tag, data)
+
+def open_port(port, baudrate):
+    """Abre un puerto serie; en Windows agranda los buffers del driver"""
+    ser = serial.Serial(port, baudrate, timeout=1)
+    if sys.platform == 'win32':
+        ser.set_buffer_size(rx_size=RX_BUFFER_SIZE, tx_size=TX_BUFFER_SIZE)
+    return ser
+
+# Línea parcial pendiente de cada puerto entre lecturas
+_rx_partial = {}
+
+def _read_lines(ser):
+    """
+    Lee de una vez todo lo disponible y devuelve las líneas completas.
+    Bloquea hasta ser.timeout por el primer byte; devuelve None si no llegó
+    nada. La línea incompleta queda guardada para la próxima lectura.
+    """
+    chunk = ser.read(max(1, ser.in_waiting))
+    if not chunk:
+        return None
+    if ser.in_waiting:
+        chunk += ser.read(ser.in_waiting)
+    *lines, _rx_partial[ser] = (_rx_partial.pop(ser, b"") + chunk).split(b"\n")
+    return [line.decode('utf-8', errors='ignore').strip() for line in lines]
 
 def wait_for_ready(ser, timeout=10):
     """Espera el mensaje READY del ESP32"""
-    start = time.time()
-    while (time.time() - start) < timeout:
-        if ser.in_waiting:
-            line = ser.readline().decode('utf-8', errors='ignore').strip()
-            if "READY" in line:
+    old_timeout = ser.timeout
+    deadline_ns = time.monotonic_ns() + int(timeout * 1e9)
+    try:
+        while True:
+            remaining_ns = deadline_ns - time.monotonic_ns()
+            if remaining_ns <= 0:
+                return False
+            # read bloquea en el driver hasta tener datos o agotar el timeout
+            ser.timeout = remaining_ns / 1e9
+            lines = _read_lines(ser)
+            if lines and any("READY" in line for line in lines):
                 return True
-    return False
+            # READY puede llegar sin "\n" final: mirar también la línea parcial
+            if b"READY" in _rx_partial.get(ser, b""):
+                del _rx_partial[ser]
+                return True
+    finally:
+        ser.timeout = old_timeout
 
-def drain_serial(ser, timeout=0.5):
-    """Vacía el buffer serial"""
-    start = time.time()
+def drain_serial(ser, timeout=0.5, first_timeout=None, wait_for=None, max_wait=10):
+    """Vacía el buffer serial (termina tras `timeout` segundos sin datos)
+
+    first_timeout permite esperar más por la primera línea (p.ej. mientras
+    el ESP32 procesa un comando) sin alargar la ventana de silencio.
+    Con wait_for (tupla de marcadores) el silencio no corta la lectura hasta
+    ver una línea que contenga alguno, o hasta agotar max_wait segundos.
+    """
+    old_timeout = ser.timeout
+    ser.timeout = timeout if first_timeout is None else first_timeout
+    deadline_ns = time.monotonic_ns() + int(max_wait * 1e9)
+    pending = wait_for
     lines = []
-    while (time.time() - start) < timeout:
-        if ser.in_waiting:
-            line = ser.readline().decode('utf-8', errors='ignore').strip()
-            if line:
-                lines.append(line)
-            start = time.time()  # Reset timeout si hay datos
-        time.sleep(0.01)
+    try:
+        while True:
+            chunk_lines = _read_lines(ser)
+            ser.timeout = timeout
+            if chunk_lines is None:
+                if not pending or time.monotonic_ns() >= deadline_ns:
+                    break  # Silencio durante todo el timeout
+                continue  # Sigue esperando el marcador (p.ej. fin del erase)
+            lines.extend(line for line in chunk_lines if line)
+            if pending and any(m in line for line in chunk_lines for m in pending):
+                pending = None
+    finally:
+        ser.timeout = old_timeout
+    # Tras el silencio, lo que quedó sin "\n" también es una línea
+    partial = _rx_partial.pop(ser, b"").decode('utf-8', errors='ignore').strip()
+    if partial:
+        lines.append(partial)
     return lines
 
-def send_command(ser, cmd, wait_ms=300):
-    """Envía un comando y lee la respuesta"""
-    ser.write(f"{cmd}\n".encode())
-    time.sleep(wait_ms / 1000)
-    return drain_serial(ser, 0.3)
+def send_command(ser, cmd, wait_ms=300, wait_for=None):
+    """Envía un comando (str, o bytes ya terminados en "\\n") y lee la respuesta
+
+    wait_for: marcadores que indican que el comando terminó (ver drain_serial)
+    """
+    ser.write(cmd if isinstance(cmd, bytes) else f"{cmd}\n".encode())
+    # Hasta wait_ms para que empiece la respuesta, luego 300ms de silencio
+    return drain_serial(ser, 0.3, first_timeout=wait_ms / 1000 + 0.3, wait_for=wait_for)
+
+def format_flash(debug):
+    """Borra la flash y espera a que el ESP32 confirme (FORMAT_OK/FORMAT_FAIL)"""
+    # "Erasing flash..." sale antes del erase; no basta con la primera línea
+    return send_command(debug, _FORMAT_CMD, 500, wait_for=_FORMAT_DONE)
 
 def get_stats(debug):
     """Obtiene estadísticas del ESP32"""
-    response = send_command(debug, "stats", 200)
+    response = send_command(debug, _STATS_CMD, 200)
     stats = {"total": 0, "bursts": 0, "overflows": 0, "dropped": 0}
     for line in response:
-        if "total=" in line:
-            try:
-                stats["total"] = int(line.split("total=")[1].split(",")[0])
-                stats["bursts"] = int(line.split("bursts=")[1].split(",")[0])
-                stats["overflows"] = int(line.split("overflows=")[1].split(")")[0].split(",")[0])
-            except:
-                pass
-        if "dropped=" in line:
-            try:
-                stats["dropped"] = int(line.split("dropped=")[1].split(",")[0].split(")")[0])
-            except:
-                pass
+        m = _STATS_RE.search(line)
+        if m:
+            stats["total"], stats["bursts"], stats["overflows"] = map(int, m.groups())
+        m = _DROPPED_RE.search(line)
+        if m:
+            stats["dropped"] = int(m.group(1))
     return stats
 
 def generate_data(size):
     """Genera datos de prueba"""
-    return bytes([i % 256 for i in range(size)])
+    return (_PATTERN * ((size + 255) // 256))[:size]
+
+def read_flash(debug, offset, length):
+    """Pide datos almacenados en flash con el comando read (líneas de hex dump)"""
+    return send_command(debug, b"read %d %d\n" % (offset, length), 200)
+
+def parse_hex_dump(lines):
+    """Convierte el hex dump completo a bytes"""
+    # Una sola conversión hex -> bytes (en C) para todo el dump
+    hex_parts = [m.group(1) for m in map(_HEX_LINE_RE.search, lines) if m]
+    return bytes.fromhex("".join(hex_parts))
+
+def hex_dump_matches(lines, expected):
+    """Compara el hex dump línea a línea contra expected; corta en la primera diferencia"""
+    expected = memoryview(expected)
+    pos = 0
+    for line in lines:
+        m = _HEX_LINE_RE.search(line)
+        if not m:
+            continue
+        chunk = bytes.fromhex(m.group(1))
+        end = pos + len(chunk)
+        if end > len(expected) or expected[pos:end] != chunk:
+            return False
+        pos = end
+    return pos == len(expected)
+
+def verify_stored_data(debug, sent):
+    """
+    Verifica el contenido almacenado contra lo enviado (no solo la longitud).
+    Lee el inicio, el medio y el final; la comparación entre memoryviews es un
+    memcmp en C.
+    """
+    expected = memoryview(sent)
+    size = len(expected)
+    offsets = sorted({0, max(0, size // 2 - READ_MAX // 2), max(0, size - READ_MAX)})
+    for offset in offsets:
+        length = min(READ_MAX, size - offset)
+        lines = read_flash(debug, offset, length)
+        if not hex_dump_matches(lines, expected[offset:offset + length]):
+            # Solo ante un error se arma el buffer completo para el diagnóstico
+            received = parse_hex_dump(lines)
+            log_write("ERROR", f"Datos corruptos en offset {offset} ({len(received)}/{length} bytes leídos)")
+            return False
+    return True
 
 def set_esp_baudrate(debug, baudrate):
     """Cambia el baudrate del ESP32 y espera confirmación"""
-    debug.write(f"baud {baudrate}\n".encode())
-    time.sleep(0.3)
-    response = drain_serial(debug, 0.5)
+    debug.write(b"baud %d\n" % baudrate)
+    response = drain_serial(debug, 0.5, first_timeout=0.8)
     for line in response:
         if "BAUD_OK" in line:
             return True
@@ -107,61 +252,74 @@ def test_baudrate_limit(sniffer_port, debug):
     results = []
     max_working_baud = 115200
     
-    for baud in baudrates:
-        log_write("TEST", f"\nProbando baudrate: {baud} bps...")
-        
-        # Cambiar baudrate del ESP32
-        if not set_esp_baudrate(debug, baud):
-            log_write("WARN", f"No se pudo configurar baudrate {baud} en ESP32")
-            continue
-        
-        # Formatear y resetear stats
-        send_command(debug, "format", 500)
-        drain_serial(debug, 0.5)
-        
-        # Abrir sniffer con nuevo baudrate
-        try:
-            sniffer = serial.Serial(sniffer_port, baud, timeout=1)
-        except Exception as e:
-            log_write("ERROR", f"No se pudo abrir sniffer a {baud}: {e}")
-            continue
-        
-        # Enviar datos
-        data = generate_data(test_size)
-        start_time = time.time()
-        sniffer.write(data)
-        sniffer.flush()
-        
-        # Esperar procesamiento
-        wait_time = max(1.0, test_size / (baud / 10) + 0.5)
-        time.sleep(wait_time)
-        drain_serial(debug, 0.5)
-        
-        elapsed = time.time() - start_time
-        stats = get_stats(debug)
+    try:
+        sniffer = open_port(sniffer_port, baudrates[0])
+    except Exception as e:
+        log_write("ERROR", f"No se pudo abrir sniffer: {e}")
+        return max_working_baud
+    
+    data = generate_data(test_size)
+    reconfig_pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        for baud in baudrates:
+            log_write("TEST", f"\nProbando baudrate: {baud} bps...")
+            
+            # Reconfigurar el sniffer (sin cerrar el puerto) mientras el ESP32 confirma
+            reconfig = reconfig_pool.submit(setattr, sniffer, "baudrate", baud)
+            
+            # Cambiar baudrate del ESP32
+            esp_ok = set_esp_baudrate(debug, baud)
+            try:
+                reconfig.result()
+            except Exception as e:
+                log_write("ERROR", f"No se pudo configurar sniffer a {baud}: {e}")
+                continue
+            if not esp_ok:
+                log_write("WARN", f"No se pudo configurar baudrate {baud} en ESP32")
+                continue
+            
+            # Formatear y resetear stats
+            format_flash(debug)
+            drain_serial(debug, 0.5)
+            
+            # Enviar datos
+            start_time = time.monotonic()
+            sniffer.write(data)
+            sniffer.flush()
+            
+            # Esperar procesamiento
+            wait_time = max(1.0, test_size / (baud / 10) + 0.5)
+            time.sleep(wait_time)
+            drain_serial(debug, 0.5)
+            
+            elapsed = time.monotonic() - start_time
+            stats = get_stats(debug)
+            
+            success = stats['total'] == test_size and stats['overflows'] == 0
+            success = success and verify_stored_data(debug, data)
+            actual_speed = stats['total'] / elapsed if elapsed > 0 else 0
+            theoretical_speed = baud / 10
+            
+            results.append({
+                'baud': baud,
+                'sent': test_size,
+                'received': stats['total'],
+                'overflows': stats['overflows'],
+                'success': success,
+                'speed': actual_speed
+            })
+            
+            status = "OK" if success else "FAIL"
+            log_write("RESULT", f"  {baud} bps: enviados={test_size}, recibidos={stats['total']}, overflows={stats['overflows']}, velocidad={actual_speed:.0f} B/s [{status}]")
+            
+            if success:
+                max_working_baud = baud
+            else:
+                log_write("LIMIT", f"Baudrate máximo encontrado: {max_working_baud} bps")
+                break
+    finally:
+        reconfig_pool.shutdown(wait=True)
         sniffer.close()
-        
-        success = stats['total'] == test_size and stats['overflows'] == 0
-        actual_speed = stats['total'] / elapsed if elapsed > 0 else 0
-        theoretical_speed = baud / 10
-        
-        results.append({
-            'baud': baud,
-            'sent': test_size,
-            'received': stats['total'],
-            'overflows': stats['overflows'],
-            'success': success,
-            'speed': actual_speed
-        })
-        
-        status = "OK" if success else "FAIL"
-        log_write("RESULT", f"  {baud} bps: enviados={test_size}, recibidos={stats['total']}, overflows={stats['overflows']}, velocidad={actual_speed:.0f} B/s [{status}]")
-        
-        if success:
-            max_working_baud = baud
-        else:
-            log_write("LIMIT", f"Baudrate máximo encontrado: {max_working_baud} bps")
-            break
     
     # Restaurar baudrate original
     log_write("TEST", "\nRestaurando baudrate a 115200...")
@@ -185,42 +343,44 @@ def test_burst_size_limit(sniffer_port, debug):
     
     results = []
     
-    for burst_size in burst_sizes:
-        log_write("TEST", f"\nProbando burst de {burst_size} bytes...")
-        
-        # Formatear
-        send_command(debug, "format", 500)
-        drain_serial(debug, 1)
-        
-        sniffer = serial.Serial(sniffer_port, 115200, timeout=1)
-        
-        # Enviar burst
-        data = generate_data(burst_size)
-        sniffer.write(data)
-        sniffer.flush()
-        
-        # Esperar procesamiento (más tiempo para bursts grandes)
-        wait_time = max(2, burst_size / 5000)
-        time.sleep(wait_time)
-        drain_serial(debug, 0.5)
-        
-        stats = get_stats(debug)
+    sniffer = open_port(sniffer_port, 115200)
+    try:
+        for burst_size in burst_sizes:
+            log_write("TEST", f"\nProbando burst de {burst_size} bytes...")
+            
+            # Formatear
+            format_flash(debug)
+            drain_serial(debug, 1)
+            
+            # Enviar burst
+            data = generate_data(burst_size)
+            sniffer.write(data)
+            sniffer.flush()
+            
+            # Esperar procesamiento (más tiempo para bursts grandes)
+            wait_time = max(2, burst_size / 5000)
+            time.sleep(wait_time)
+            drain_serial(debug, 0.5)
+            
+            stats = get_stats(debug)
+            
+            success = stats['total'] == burst_size and stats['overflows'] == 0
+            success = success and verify_stored_data(debug, data)
+            results.append({
+                'size': burst_size,
+                'received': stats['total'],
+                'overflows': stats['overflows'],
+                'success': success
+            })
+            
+            status = "OK" if success else "FAIL"
+            log_write("RESULT", f"  {burst_size} bytes: recibidos={stats['total']}, overflows={stats['overflows']} [{status}]")
+            
+            if not success:
+                log_write("LIMIT", f"Límite de burst encontrado: {burst_sizes[burst_sizes.index(burst_size)-1] if burst_sizes.index(burst_size) > 0 else 0} bytes")
+                break
+    finally:
         sniffer.close()
-        
-        success = stats['total'] == burst_size and stats['overflows'] == 0
-        results.append({
-            'size': burst_size,
-            'received': stats['total'],
-            'overflows': stats['overflows'],
-            'success': success
-        })
-        
-        status = "OK" if success else "FAIL"
-        log_write("RESULT", f"  {burst_size} bytes: recibidos={stats['total']}, overflows={stats['overflows']} [{status}]")
-        
-        if not success:
-            log_write("LIMIT", f"Límite de burst encontrado: {burst_sizes[burst_sizes.index(burst_size)-1] if burst_sizes.index(burst_size) > 0 else 0} bytes")
-            break
     
     # Resumen
     log_write("TEST", "\nResumen de burst sizes:")
@@ -242,38 +402,38 @@ def test_continuous_rate(sniffer_port, debug):
     log_write("TEST", "=" * 60)
     
     # Formatear
-    send_command(debug, "format", 500)
+    format_flash(debug)
     drain_serial(debug, 1)
     
-    sniffer = serial.Serial(sniffer_port, 115200, timeout=1)
-    
-    chunk_size = 1000
+    chunk_size = 16000
     total_sent = 0
     total_time = 10  # segundos de prueba
     
-    log_write("TEST", f"Enviando datos continuamente por {total_time} segundos...")
-    
-    start_time = time.time()
-    chunks_sent = 0
-    
-    while (time.time() - start_time) < total_time:
+    sniffer = open_port(sniffer_port, 115200)
+    try:
+        log_write("TEST", f"Enviando datos continuamente por {total_time} segundos...")
+        
         data = generate_data(chunk_size)
-        sniffer.write(data)
-        total_sent += chunk_size
-        chunks_sent += 1
+        start_time = time.monotonic()
+        deadline_ns = time.monotonic_ns() + int(total_time * 1e9)
+        chunks_sent = 0
         
-        # Pequeña pausa para no saturar el buffer del OS
-        time.sleep(0.05)
-    
-    sniffer.flush()
-    elapsed = time.time() - start_time
-    
-    # Esperar que termine de procesar
-    time.sleep(2)
-    drain_serial(debug, 1)
-    
-    stats = get_stats(debug)
-    sniffer.close()
+        while time.monotonic_ns() < deadline_ns:
+            sniffer.write(data)
+            total_sent += chunk_size
+            chunks_sent += 1
+            # Sin pausa: write() bloquea cuando se llena el buffer TX del OS
+        
+        sniffer.flush()
+        elapsed = time.monotonic() - start_time
+        
+        # Esperar que termine de procesar
+        time.sleep(2)
+        drain_serial(debug, 1)
+        
+        stats = get_stats(debug)
+    finally:
+        sniffer.close()
     
     loss = total_sent - stats['total']
     loss_percent = (loss / total_sent) * 100 if total_sent > 0 else 0
@@ -304,47 +464,48 @@ def test_rapid_bursts(sniffer_port, debug):
     intervals = [200, 150, 120, 100, 80, 60, 50, 40, 30, 20]
     
     results = []
+    data = generate_data(burst_size)
     
-    for interval_ms in intervals:
-        log_write("TEST", f"\nProbando intervalo de {interval_ms}ms entre bursts...")
-        
-        # Formatear
-        send_command(debug, "format", 500)
-        drain_serial(debug, 1)
-        
-        sniffer = serial.Serial(sniffer_port, 115200, timeout=1)
-        
-        total_sent = 0
-        for i in range(num_bursts):
-            data = generate_data(burst_size)
-            sniffer.write(data)
-            total_sent += burst_size
-            time.sleep(interval_ms / 1000)
-        
-        sniffer.flush()
-        
-        # Esperar procesamiento
-        time.sleep(2)
-        drain_serial(debug, 0.5)
-        
-        stats = get_stats(debug)
+    sniffer = open_port(sniffer_port, 115200)
+    try:
+        for interval_ms in intervals:
+            log_write("TEST", f"\nProbando intervalo de {interval_ms}ms entre bursts...")
+            
+            # Formatear
+            format_flash(debug)
+            drain_serial(debug, 1)
+            
+            total_sent = 0
+            for i in range(num_bursts):
+                sniffer.write(data)
+                total_sent += burst_size
+                time.sleep(interval_ms / 1000)
+            
+            sniffer.flush()
+            
+            # Esperar procesamiento
+            time.sleep(2)
+            drain_serial(debug, 0.5)
+            
+            stats = get_stats(debug)
+            
+            success = stats['total'] == total_sent and stats['overflows'] == 0
+            results.append({
+                'interval': interval_ms,
+                'sent': total_sent,
+                'received': stats['total'],
+                'overflows': stats['overflows'],
+                'success': success
+            })
+            
+            status = "OK" if success else "FAIL"
+            log_write("RESULT", f"  {interval_ms}ms: enviados={total_sent}, recibidos={stats['total']}, overflows={stats['overflows']} [{status}]")
+            
+            if not success:
+                log_write("LIMIT", f"Intervalo mínimo encontrado: {intervals[intervals.index(interval_ms)-1] if intervals.index(interval_ms) > 0 else intervals[0]}ms")
+                break
+    finally:
         sniffer.close()
-        
-        success = stats['total'] == total_sent and stats['overflows'] == 0
-        results.append({
-            'interval': interval_ms,
-            'sent': total_sent,
-            'received': stats['total'],
-            'overflows': stats['overflows'],
-            'success': success
-        })
-        
-        status = "OK" if success else "FAIL"
-        log_write("RESULT", f"  {interval_ms}ms: enviados={total_sent}, recibidos={stats['total']}, overflows={stats['overflows']} [{status}]")
-        
-        if not success:
-            log_write("LIMIT", f"Intervalo mínimo encontrado: {intervals[intervals.index(interval_ms)-1] if intervals.index(interval_ms) > 0 else intervals[0]}ms")
-            break
     
     min_interval = intervals[0]
     for r in results:
@@ -370,34 +531,31 @@ def test_flash_write_speed(sniffer_port, debug):
     set_esp_baudrate(debug, test_baud)
     
     # Formatear
-    send_command(debug, "format", 500)
+    format_flash(debug)
     drain_serial(debug, 1)
     
-    sniffer = serial.Serial(sniffer_port, test_baud, timeout=1)
+    sniffer = open_port(sniffer_port, test_baud)
     
     # Llenar la flash completamente - envío rápido sin pausas
     flash_size = 65536  # Tamaño real de partición
-    chunk_size = 8000
-    total_sent = 0
     
     log_write("TEST", f"Llenando flash ({flash_size} bytes) a máxima velocidad...")
     
-    start_time = time.time()
+    data = generate_data(flash_size)
+    start_time = time.monotonic()
     
-    # Enviar todo de una vez
-    while total_sent < flash_size:
-        data = generate_data(chunk_size)
-        sniffer.write(data)
-        total_sent += chunk_size
+    # Enviar todo de una vez (el buffer del OS y el UART marcan el ritmo)
+    sniffer.write(data)
+    total_sent = len(data)
     
     sniffer.flush()
-    send_time = time.time() - start_time
+    send_time = time.monotonic() - start_time
     
     # Esperar que termine de escribir
     time.sleep(3)
     drain_serial(debug, 1)
     
-    total_time = time.time() - start_time
+    total_time = time.monotonic() - start_time
     
     stats = get_stats(debug)
     sniffer.close()
@@ -417,10 +575,10 @@ def test_flash_write_speed(sniffer_port, debug):
     return flash_speed
 
 def main():
-    global log_file
+    global log_file, log_executor
     
-    # Abrir log
-    log_file = open(LOG_FILE, "w", encoding="utf-8")
+    # Abrir log binario con buffer grande (sin TextIOWrapper): solo se revisa al terminar
+    log_file = open(LOG_FILE, "wb", buffering=1 << 16)
     
     log_write("INFO", "=" * 60)
     log_write("INFO", "DATALOGGER STRESS TEST - PRUEBA DE LÍMITES")
@@ -432,18 +590,22 @@ def main():
     # Abrir debug y esperar ready
     log_write("INFO", "Conectando al ESP32...")
     try:
-        debug = serial.Serial(DEBUG_PORT, 115200, timeout=1)
+        debug = open_port(DEBUG_PORT, 115200)
     except Exception as e:
         log_write("ERROR", f"No se pudo abrir DEBUG: {e}")
+        log_file.close()
         return 1
     
     if not wait_for_ready(debug):
         log_write("ERROR", "ESP32 no responde")
         debug.close()
+        log_file.close()
         return 1
     
     log_write("INFO", "ESP32 conectado!\n")
     
+    log_executor = ThreadPoolExecutor(max_workers=1)
+    
     try:
         # Ejecutar tests
         results = {}
@@ -480,8 +642,12 @@ def main():
         return 0
         
     finally:
+        # Vaciar la cola de log antes de cerrar el archivo
+        log_executor.shutdown(wait=True)
+        log_executor = None
         debug.close()
         if log_file:
+            log_file.flush()
             log_file.close()
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 
 import paho.mqtt.client as mqtt
 import json
+import threading
 import time
 
 BROKER_HOST = "localhost"
@@ -10,8 +11,9 @@ BROKER_PORT = 1883
 COMMAND_TOPIC = "datalogger/commands"
 RESPONSE_TOPIC = "datalogger/telemetry/response"
 DEVICE_ID = "FJACFFBI"
+RESPONSE_TIMEOUT = 10
 
-response_received = False
+response_event = threading.Event()
 response_data = None
 
 def on_connect(client, userdata, flags, rc):
@@ -21,17 +23,40 @@ def on_connect(client, userdata, flags, rc):
 
 def on_subscribe(client, userdata, mid, granted_qos):
     print(f"[OK] Suscrito (mid={mid}, qos={granted_qos[0]})")
+    # Con la suscripción confirmada, enviar el comando
+    publish_command(client)
 
 def on_message(client, userdata, msg):
-    global response_received, response_data
+    global response_data
     print(f"\n[OK] Mensaje recibido en topic: {msg.topic}")
     print(f"[OK] Payload: {msg.payload.decode()}")
-    response_received = True
     response_data = msg.payload.decode()
+    response_event.set()
+    # Respuesta recibida: cerrar la conexión termina loop_forever()
+    client.disconnect()
 
-def main():
-    global response_received
+def publish_command(client):
+    # Preparar comando (SIN campo 'id')
+    cmd = {
+        "deviceId": DEVICE_ID,
+        "command": "help",
+        "args": ""
+    }
+    cmd_str = json.dumps(cmd)
+    
+    print(f"\n[->] Enviando comando:")
+    print(f"    {cmd_str}")
     
+    # Publicar
+    result = client.publish(COMMAND_TOPIC, cmd_str, qos=1)
+    if result.rc == mqtt.MQTT_ERR_SUCCESS:
+        print(f"[OK] Comando publicado (mid={result.mid})")
+    else:
+        print(f"[ERROR] Error al publicar: {result.rc}")
+    
+    print(f"\n[->] Esperando respuesta (timeout: {RESPONSE_TIMEOUT}s)...")
+
+def main():
     print("=" * 60)
     print("Diagnóstico MQTT - Comando Help")
     print("=" * 60)
@@ -55,43 +80,17 @@ def main():
         print(f"[ERROR] Error de conexion: {e}")
         return
     
-    # Iniciar loop
-    client.loop_start()
-    
-    # Esperar conexión
-    time.sleep(2)
+    # Timeout global: desconectar si no llega la respuesta
+    timer = threading.Timer(RESPONSE_TIMEOUT, client.disconnect)
+    timer.daemon = True
     
-    # Preparar comando (SIN campo 'id')
-    cmd = {
-        "deviceId": DEVICE_ID,
-        "command": "help",
-        "args": ""
-    }
-    cmd_str = json.dumps(cmd)
-    
-    print(f"\n[->] Enviando comando:")
-    print(f"    {cmd_str}")
-    
-    # Publicar
-    result = client.publish(COMMAND_TOPIC, cmd_str, qos=1)
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-        print(f"[OK] Comando publicado (mid={result.mid})")
-    else:
-        print(f"[ERROR] Error al publicar: {result.rc}")
-    
-    # Esperar respuesta
-    print(f"\n[->] Esperando respuesta (timeout: 10s)...")
-    for i in range(10):
-        if response_received:
-            break
-        print(f"    Esperando... ({i+1}s)", end="\r")
-        time.sleep(1)
-    
-    print()  # Nueva línea
-    
-    # Detener y desconectar
-    client.loop_stop()
-    client.disconnect()
+    # Loop de red en el hilo principal; retorna al desconectar
+    start = time.monotonic()
+    timer.start()
+    client.loop_forever()
+    timer.cancel()
+    print(f"    Espera: {time.monotonic() - start:.2f}s")
+    response_received = response_event.is_set()
     
     # Resultado
     print("\n" + "=" * 60)
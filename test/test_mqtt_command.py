@@ -7,9 +7,11 @@ Requiere: pip install paho-mqtt
 
 import paho.mqtt.client as mqtt
 import json
+import threading
 import time
 import sys
 import os
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
@@ -24,10 +26,13 @@ COMMAND_TOPIC = "datalogger/commands"
 RESPONSE_TOPIC = "datalogger/telemetry/response"
 DEVICE_ID = "FJACFFBI"
 COMMAND = "help"
+RESPONSE_TIMEOUT = 10
 
 # Variables globales
-response_received = False
-response_data = None
+# Respuestas pendientes por ID de correlación
+pending = {}
+pending_lock = threading.Lock()
+subscribed = threading.Event()
 
 def on_connect(client, userdata, flags, rc):
     """Callback cuando se conecta al broker"""
@@ -46,8 +51,6 @@ def on_disconnect(client, userdata, rc):
 
 def on_message(client, userdata, msg):
     """Callback cuando se recibe un mensaje"""
-    global response_received, response_data
-    
     try:
         payload = msg.payload.decode('utf-8')
         print(f"\n[->] Respuesta recibida en '{msg.topic}':")
@@ -55,8 +58,6 @@ def on_message(client, userdata, msg):
         
         # Parsear JSON
         data = json.loads(payload)
-        response_data = data
-        response_received = True
         
         # Verificar que sea una respuesta de comando
         if data.get("type") == "command_response":
@@ -68,6 +69,12 @@ def on_message(client, userdata, msg):
                 print(f"    ID correlacion: {data['id']}")
         else:
             print(f"[!] Advertencia: El mensaje no es una respuesta de comando")
+        
+        # Completar la petición pendiente con ese ID
+        with pending_lock:
+            future = pending.pop(data.get("id"), None)
+        if future:
+            future.set_result(data)
             
     except json.JSONDecodeError as e:
         print(f"[ERROR] Error al parsear JSON: {e}")
@@ -78,9 +85,10 @@ def on_message(client, userdata, msg):
 def on_subscribe(client, userdata, mid, granted_qos):
     """Callback cuando se completa la suscripción"""
     print(f"[OK] Suscripcion confirmada (QoS: {granted_qos[0]})")
+    subscribed.set()
 
 def send_command(client, device_id, command, args="", request_id=None):
-    """Envía un comando por MQTT"""
+    """Envía un comando por MQTT; devuelve el MQTTMessageInfo o None si falla"""
     cmd_json = {
         "deviceId": device_id,
         "command": command,
@@ -98,14 +106,36 @@ def send_command(client, device_id, command, args="", request_id=None):
     
     if result.rc == mqtt.MQTT_ERR_SUCCESS:
         print(f"[OK] Comando enviado exitosamente")
-        return True
+        return result
     else:
         print(f"[ERROR] Error al enviar comando. Codigo: {result.rc}")
-        return False
+        return None
+
+def request(client, device_id, command, args="", timeout=RESPONSE_TIMEOUT):
+    """
+    Envía un comando y bloquea hasta su respuesta.
+    Devuelve (request_id, respuesta); la respuesta es None si vence el timeout.
+    """
+    request_id = f"test_{time.time_ns()}"
+    future = Future()
+    with pending_lock:
+        pending[request_id] = future
+    try:
+        info = send_command(client, device_id, command, args, request_id)
+        if info is None:
+            raise RuntimeError("No se pudo publicar el comando")
+        # QoS 1: esperar el PUBACK del broker
+        info.wait_for_publish(timeout=5)
+        
+        print(f"\n[->] Esperando respuesta... (timeout: {timeout}s)")
+        return request_id, future.result(timeout=timeout)
+    except FutureTimeoutError:
+        return request_id, None
+    finally:
+        with pending_lock:
+            pending.pop(request_id, None)
 
 def main():
-    global response_received, response_data
-    
     print("=" * 60)
     print("Test de Comandos MQTT - DataLogger")
     print("=" * 60)
@@ -132,30 +162,19 @@ def main():
         print(f"\n[->] Conectando al broker...")
         client.connect(BROKER_HOST, BROKER_PORT, 60)
         
-        # Iniciar loop en background
+        # Loop de red en background; el hilo principal bloquea en request()
         client.loop_start()
-        
-        # Esperar un momento para que la conexión se establezca
-        time.sleep(1)
-        
-        # Enviar comando
-        request_id = f"test_{int(time.time())}"
-        if not send_command(client, DEVICE_ID, COMMAND, "", request_id):
+        if not subscribed.wait(timeout=RESPONSE_TIMEOUT):
+            print("[ERROR] No se confirmo la suscripcion")
             client.loop_stop()
             client.disconnect()
-            sys.exit(1)
+            return 1
         
-        # Esperar respuesta (timeout de 10 segundos)
-        print(f"\n[->] Esperando respuesta... (timeout: 10s)")
-        timeout = 10
-        elapsed = 0
-        while not response_received and elapsed < timeout:
-            time.sleep(0.5)
-            elapsed += 0.5
-            if elapsed % 2 == 0:
-                print(f"    Esperando... ({elapsed:.0f}s)")
+        start = time.monotonic()
+        request_id, response_data = request(client, DEVICE_ID, COMMAND)
+        print(f"    Espera: {time.monotonic() - start:.2f}s")
+        response_received = response_data is not None
         
-        # Detener loop
         client.loop_stop()
         client.disconnect()
         